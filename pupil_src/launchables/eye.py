@@ -566,6 +566,17 @@ def eye(
         def window_should_update():
             return next(window_update_timer)
 
+        def wait_for_timestamp_export(writer):
+            # eye timestamps are saved in the background, see AV_Writer.close()
+            # Wait for them, since the process does not wait on exit.
+            timestamp_save_future = getattr(writer, "timestamp_save_future", None)
+            if timestamp_save_future is None:
+                return
+            try:
+                timestamp_save_future.result()
+            except Exception:
+                logger.exception("Saving eye timestamps failed!")
+
         logger.warning("Process started.")
 
         frame = None
@@ -611,6 +622,7 @@ def eye(
                             g_pool.capture.intrinsics.save(
                                 g_pool.rec_path, custom_name=f"eye{eye_id}"
                             )
+                            wait_for_timestamp_export(g_pool.writer)
                         finally:
                             g_pool.writer = None
                 elif subject.startswith("meta.should_doc"):
@@ -690,6 +702,8 @@ def eye(
 
                 if g_pool.writer:
                     try:
+                        # NOTE: The frame's image data is encoded asynchronously and
+                        # must not be modified after writing.
                         g_pool.writer.write_video_frame(frame)
                     except NonMonotonicTimestampError as e:
                         logger.error(
@@ -719,6 +733,7 @@ def eye(
         if g_pool.writer:
             logger.info("Done recording eye.")
             g_pool.writer.release()
+            wait_for_timestamp_export(g_pool.writer)
             g_pool.writer = None
 
         session_settings["loaded_plugins"] = g_pool.plugins.get_initializers()
@@ -13,13 +13,19 @@ import abc
 import math
 import logging
 import collections
+import functools
 import multiprocessing as mp
 import os
+import queue
+import threading
 import typing as T
+from concurrent.futures import ThreadPoolExecutor
 from fractions import Fraction
 
 import av
+import cv2
 import numpy as np
+import psutil
 from av.packet import Packet
 
 import audio_utils
@@ -68,29 +74,73 @@ def write_timestamps(file_loc, timestamps, output_format="npy"):
     name, ext = os.path.splitext(video_file)
     ts_file = "{}_timestamps".format(name)
     ts_loc = os.path.join(directory, ts_file)
-    ts = np.array(timestamps)
+    ts = np.asarray(timestamps)
     if output_format not in ("npy", "csv", "all"):
         raise ValueError("Unknown timestamp output format `{}`".format(output_format))
     if output_format in ("npy", "all"):
-        np.save(ts_loc + ".npy", ts)
+        with open(ts_loc + ".npy", "wb", buffering=1 << 20) as f:
+            np.lib.format.write_array(f, ts, allow_pickle=False)
     if output_format in ("csv", "all"):
         output_video = Video(file_loc)
         try:
             container = output_video.load_container()
             pts = output_video.load_pts(container)
-            ts_pts = np.vstack((ts, pts)).T
-            np.savetxt(
-                ts_loc + ".csv",
-                ts_pts,
-                fmt=["%f", "%i"],
-                delimiter=",",
-                header="timestamps [seconds],pts",
-            )
+            _write_timestamps_csv(ts_loc + ".csv", ts, pts)
         except InvalidContainerError:
             logger.error(f"Failed to extract PTS frome exported video {file_loc}")
             return
 
 
+def _write_timestamps_csv(file_loc, timestamps, pts, chunk_size=65536):
+    """
+    Writes timestamps and pts to csv, equivalent to np.savetxt() output.
+
+    Rows are formatted in chunks with a single format operation each, which is
+    considerably faster than np.savetxt() formatting every row separately.
+    """
+    if len(timestamps) != len(pts):
+        raise ValueError(
+            f"Got {len(timestamps)} timestamps but {len(pts)} pts for {file_loc}"
+        )
+
+    # buffers reused for all chunks
+    rows = np.empty((min(chunk_size, len(timestamps)), 2), dtype=np.float64)
+    chunk_format = "%f,%i\n" * len(rows)
+
+    with open(file_loc, "wb", buffering=1 << 20) as f:
+        f.write(b"# timestamps [seconds],pts\n")
+        for start in range(0, len(timestamps), chunk_size):
+            stop = min(start + chunk_size, len(timestamps))
+            count = stop - start
+            rows[:count, 0] = timestamps[start:stop]
+            rows[:count, 1] = pts[start:stop]
+            if count < len(rows):
+                chunk_format = "%f,%i\n" * count
+            text = chunk_format % tuple(rows[:count].ravel().tolist())
+            f.write(text.encode())
+
+
+def _drop_from_page_cache(file_loc):
+    """
+    Advises the kernel to drop file from the page cache.
+
+    This keeps a finished recording from competing for memory with the next one.
+    Only clean pages are dropped, for dirty pages the kernel just starts the
+    writeback. The file is not synced, so this does not block on disk I/O.
+    Not supported on all platforms, in which case this does nothing.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_loc, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError as err:
+        logger.debug(f"Could not drop {file_loc} from page cache: {err}")
+
+
 class NonMonotonicTimestampError(ValueError):
     """Indicates that a Writer received non-monotonic data to write."""
 
@@ -107,13 +157,22 @@ class AV_Writer(abc.ABC):
             Will be used to calculate positions of frames (pts).
         """
 
-        self.timestamps = []
+        # preallocated timestamp buffer, grown geometrically when full
+        self._timestamps = np.empty(4096, dtype=np.float64)
+        self._timestamp_count = 0
         self.start_time = start_time_synced
+        # pts and timestamp of the last successfully encoded frame
         self.last_video_pts = float("-inf")
+        self.last_video_ts = float("-inf")
+        # pts and timestamp of the last frame queued for encoding
+        self._last_queued_pts = float("-inf")
+        self._last_queued_ts = float("-inf")
 
         # always write with highest resolution for mp4
         # NOTE: libav might lower the resolution on saving, if possible
         self.time_base = Fraction(1, 65535)
+        # avoid Fraction arithmetic when calculating pts for every frame
+        self._pts_scale = float(1 / self.time_base)
 
         self.output_file_path = output_file_path
         directory, video_file = os.path.split(output_file_path)
@@ -126,7 +185,19 @@ class AV_Writer(abc.ABC):
                 "Using a different container is risky!"
             )
 
-        self.container = av.open(output_file_path, "w")
+        container_options = {}
+        if ext in (".mp4", ".mov"):
+            # Write fragmented mp4 with fragments of at least 1 second. Packets are
+            # written in file order in larger chunks and no index needs to be moved
+            # when closing. Files stay readable up to the last complete fragment if
+            # writing is interrupted, at the cost of slightly larger files.
+            container_options = {
+                "movflags": "+empty_moov+frag_keyframe+default_base_moof",
+                "min_frag_duration": "1000000",
+                "flush_packets": "0",
+            }
+
+        self.container = av.open(output_file_path, "w", options=container_options)
         logger.debug("Opened '{}' for writing.".format(output_file_path))
 
         self.configured = False
@@ -139,15 +210,44 @@ class AV_Writer(abc.ABC):
         BIT_RATE = 15000 * 10e3
         self.video_stream.bit_rate = BIT_RATE
         self.video_stream.bit_rate_tolerance = BIT_RATE / 20
-        self.video_stream.thread_count = max(1, mp.cpu_count() - 1)
+        # NOTE: PyAV configures slice threading by default. Frame threading is only
+        # supported by libav for intra-only encoders and would additionally keep
+        # references to the reused frame buffer of MPEG_Writer, so keep the default.
+        # Hyper-threads add contention instead of throughput for slice encoding.
+        physical_cores = psutil.cpu_count(logical=False) or mp.cpu_count() // 2
+        self.video_stream.thread_count = max(1, physical_cores)
 
         self.closed = False
 
+        # Encoding and muxing run on separate worker threads, such that writing a
+        # frame does not block the caller. The bounded queues apply back-pressure
+        # in case encoding or muxing cannot keep up.
+        self._encode_queue = queue.Queue(maxsize=8)
+        self._mux_queue = queue.Queue(maxsize=8)
+        self._encode_thread = threading.Thread(
+            target=self._encode_worker, name="AV_Writer encode", daemon=True
+        )
+        self._mux_thread = threading.Thread(
+            target=self._mux_worker, name="AV_Writer mux", daemon=True
+        )
+        # First exception raised on a worker thread, will be re-raised on the caller
+        # thread from write_video_frame() or close().
+        self._worker_error = None
+        self._worker_error_lock = threading.Lock()
+        self._encode_thread.start()
+        self._mux_thread.start()
+
+        # Timestamps are saved in the background on close(), such that closing
+        # does not block on disk I/O. Wait on this future for the files to exist.
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+        self.timestamp_save_future = None
+
     def write_video_frame(self, input_frame):
         """
         Write a frame to the video_stream.
 
-        For subclasses, implement self.encode_frame().
+        The frame data is encoded asynchronously and must not be modified afterwards.
+        For subclasses, implement self.get_frame_data() and self.encode_frame().
         """
         if self.closed:
             logger.warning("Container was closed already!")
@@ -158,6 +258,17 @@ class AV_Writer(abc.ABC):
             self.video_stream.width = input_frame.width
             self.configured = True
             self.on_first_frame(input_frame)
+            # Stream time bases are only valid after the header has been written,
+            # which would otherwise happen asynchronously with the first mux.
+            self.container.start_encoding()
+            # skip the checks above for all following frames, until closed
+            self.write_video_frame = self._write_configured_video_frame
+
+        self._write_configured_video_frame(input_frame)
+
+    def _write_configured_video_frame(self, input_frame):
+        if self._worker_error is not None:
+            self._raise_worker_error()
 
         ts = input_frame.timestamp
 
@@ -168,61 +279,158 @@ class AV_Writer(abc.ABC):
             logger.debug("Skipping frame that arrived before sync time.")
             return
 
-        if self.timestamps:
-            last_ts = self.timestamps[-1]
-            if ts < last_ts:
+        last_ts = self._last_queued_ts
+        if ts < last_ts:
+            # Releasing might raise a pending worker error, which must not hide
+            # the timestamp error. Attach it as cause instead.
+            worker_error = None
+            try:
                 self.release()
-                raise NonMonotonicTimestampError(
-                    "Non-monotonic timestamps!"
-                    f"Last timestamp: {last_ts}. Given timestamp: {ts}"
-                )
+            except Exception as err:
+                worker_error = err
+            raise NonMonotonicTimestampError(
+                "Non-monotonic timestamps!"
+                f"Last timestamp: {last_ts}. Given timestamp: {ts}"
+            ) from worker_error
 
-        pts = int((input_frame.timestamp - self.start_time) / self.time_base)
+        pts = int((ts - self.start_time) * self._pts_scale)
 
         # ensure strong monotonic pts
-        pts = max(pts, self.last_video_pts + 1)
+        pts = max(pts, self._last_queued_pts + 1)
+
+        # Frame data might be decoded lazily by the frame, which is not thread-safe.
+        # Access it on the caller thread, only the data is passed to the encoder.
+        frame_data = self.get_frame_data(input_frame)
+
+        if not self._put_encode_queue((frame_data, input_frame.index, pts, ts)):
+            raise RuntimeError("Encoding thread stopped unexpectedly!")
+
+        self._last_queued_pts = pts
+        self._last_queued_ts = ts
+
+    def _put_encode_queue(self, item) -> bool:
+        """Queue item for encoding. Returns False if the encoding thread is gone."""
+        while self._encode_thread.is_alive():
+            try:
+                self._encode_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _set_worker_error(self, error):
+        with self._worker_error_lock:
+            if self._worker_error is None:
+                self._worker_error = error
+            else:
+                logger.debug(f"Dropping subsequent worker error: {error}")
 
+    def _raise_worker_error(self):
+        with self._worker_error_lock:
+            error, self._worker_error = self._worker_error, None
+        if error is not None:
+            raise error
+
+    def _encode_worker(self):
+        try:
+            while True:
+                item = self._encode_queue.get()
+                if item is None:
+                    break
+                frame_data, frame_index, pts, ts = item
+                try:
+                    self._encode_video_frame(frame_data, frame_index, pts, ts)
+                except Exception as err:
+                    self._set_worker_error(err)
+
+            if self.configured:
+                # at least one frame has been written, flush stream
+                self._mux_queue.put(list(self.video_stream.encode(None)))
+        except Exception as err:
+            self._set_worker_error(err)
+        finally:
+            self._mux_queue.put(None)
+
+    def _mux_worker(self):
+        while True:
+            packets = self._mux_queue.get()
+            if packets is None:
+                break
+            try:
+                self.container.mux(packets)
+            except Exception as err:
+                self._set_worker_error(err)
+
+    def _encode_video_frame(self, frame_data, frame_index: int, pts: int, ts: float):
         # TODO: Use custom Frame wrapper class, that wraps backend-specific frames.
         # This way we could just attach the pts here to the frame.
         # Currently this will fail e.g. for av.VideoFrame.
-        video_packed_encoded = False
-        for packet in self.encode_frame(input_frame, pts):
-            if packet.stream is self.video_stream:
-                if video_packed_encoded:
-                    # NOTE: Assumption: Each frame is encoded into a single packet!
-                    # This is required for the frame.pts == packet.pts assumption below.
-                    logger.warning("Single frame yielded more than one packet")
-                video_packed_encoded = True
-            self.container.mux(packet)
-
-        if not video_packed_encoded:
-            logger.warning(f"Encoding frame {input_frame.index} failed!")
+        packets = list(self.encode_frame(frame_data, pts))
+        # mux all packets of a frame at once
+        self._mux_queue.put(packets)
+
+        video_packet_count = sum(
+            1 for packet in packets if packet.stream is self.video_stream
+        )
+        if video_packet_count > 1:
+            # NOTE: Assumption: Each frame is encoded into a single packet!
+            # This is required for the frame.pts == packet.pts assumption below.
+            logger.warning("Single frame yielded more than one packet")
+
+        if not video_packet_count:
+            logger.warning(f"Encoding frame {frame_index} failed!")
             return
 
         self.last_video_pts = pts
-        self.timestamps.append(ts)
+        self.last_video_ts = ts
+        if self._timestamp_count == len(self._timestamps):
+            self._timestamps = np.resize(self._timestamps, 2 * len(self._timestamps))
+        self._timestamps[self._timestamp_count] = ts
+        self._timestamp_count += 1
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Timestamps of all successfully encoded frames."""
+        return self._timestamps[: self._timestamp_count]
 
     def close(self, timestamp_export_format="npy"):
-        """Close writer, triggering stream and timestamp save."""
+        """
+        Close writer, triggering stream and timestamp save.
+
+        Errors that occurred while encoding and were not raised from
+        write_video_frame() yet are raised after closing.
+        """
 
         if self.closed:
             logger.warning("Trying to close container multiple times!")
             return
 
-        if self.configured:
-            # at least one frame has been written, flush stream
-            for packet in self.video_stream.encode(None):
-                self.container.mux(packet)
+        # wait for all pending frames to be encoded and muxed, this also flushes
+        # the video stream
+        self._put_encode_queue(None)
+        self._encode_thread.join()
+        self._mux_thread.join()
 
         self.container.close()
         self.closed = True
+        # restore write_video_frame() checks, which warn about the closed container
+        vars(self).pop("write_video_frame", None)
 
         if self.configured and timestamp_export_format is not None:
             # Requires self.container to be closed since we extract pts
             # from the exported video file.
-            write_timestamps(
-                self.output_file_path, self.timestamps, timestamp_export_format
+            self.timestamp_save_future = self._io_pool.submit(
+                write_timestamps,
+                self.output_file_path,
+                self.timestamps,
+                timestamp_export_format,
             )
+        # Submitted after the timestamp export, since it reads the video file again.
+        self._io_pool.submit(_drop_from_page_cache, self.output_file_path)
+        # already submitted tasks will still be executed
+        self._io_pool.shutdown(wait=False)
+
+        self._raise_worker_error()
 
     def release(self):
         """Close writer, triggering stream and timestamp save."""
@@ -237,8 +445,17 @@ class AV_Writer(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def encode_frame(self, input_frame, pts: int) -> T.Iterator[Packet]:
-        """Encode a frame into one or multiple av packets with given pts."""
+    def get_frame_data(self, input_frame) -> T.Any:
+        """
+        Get the data to encode from a frame.
+
+        Called on the thread writing the frame. The result is passed to
+        encode_frame() on the encoding thread.
+        """
+
+    @abc.abstractmethod
+    def encode_frame(self, frame_data, pts: int) -> T.Iterator[Packet]:
+        """Encode frame data into one or multiple av packets with given pts."""
 
     @property
     @abc.abstractmethod
@@ -264,26 +481,64 @@ class MPEG_Writer(AV_Writer):
 
     def on_first_frame(self, input_frame) -> None:
         # setup av frame once to use as buffer throughout the process
+        self.yuv420_buffer = None
         if input_frame.yuv_buffer is not None:
             pix_format = "yuv422p"
+        elif input_frame.width % 2 == 0 and input_frame.height % 2 == 0:
+            # Convert BGR images to the encoder's pixel format with OpenCV, which is
+            # considerably faster than libav's internal conversion.
+            pix_format = "yuv420p"
+            self.yuv420_buffer = np.empty(
+                (input_frame.height * 3 // 2, input_frame.width), dtype=np.uint8
+            )
         else:
             pix_format = "bgr24"
+        self.pix_format = pix_format
         self.frame = av.VideoFrame(input_frame.width, input_frame.height, pix_format)
         self.frame.time_base = self.time_base
-
-    def encode_frame(self, input_frame, pts: int) -> T.Iterator[Packet]:
-        if input_frame.yuv_buffer is not None:
-            y, u, v = input_frame.yuv422
-            self.frame.planes[0].update(y)
-            self.frame.planes[1].update(u)
-            self.frame.planes[2].update(v)
+        # numpy views onto the libav-owned plane buffers, input data is copied
+        # directly into these instead of going through plane.update()
+        self.plane_views = [
+            np.frombuffer(plane, dtype=np.uint8).reshape(plane.height, plane.line_size)
+            for plane in self.frame.planes
+        ]
+
+    def get_frame_data(self, input_frame):
+        if self.pix_format == "yuv422p":
+            return input_frame.yuv422
+        return input_frame.img
+
+    def encode_frame(self, frame_data, pts: int) -> T.Iterator[Packet]:
+        if self.pix_format == "yuv422p":
+            planes = frame_data
+        elif self.yuv420_buffer is not None:
+            planes = self._bgr_to_yuv420(frame_data)
         else:
-            self.frame.planes[0].update(input_frame.img)
+            planes = (frame_data,)
+
+        for plane_view, plane_data in zip(self.plane_views, planes):
+            # plane rows might be padded, only fill the actual image data
+            plane_data = np.asarray(plane_data).reshape(plane_view.shape[0], -1)
+            np.copyto(plane_view[:, : plane_data.shape[1]], plane_data)
 
         self.frame.pts = pts
 
         yield from self.video_stream.encode(self.frame)
 
+    def _bgr_to_yuv420(self, img):
+        """Converts BGR image to (y, u, v) planes, using BT.601 like libav."""
+        yuv = cv2.cvtColor(img, cv2.COLOR_BGR2YUV_I420, dst=self.yuv420_buffer)
+        # planes are stored consecutively: y (h x w), u and v (h/2 x w/2 each)
+        # NOTE: u and v do not necessarily cover whole rows of the buffer.
+        height, width = img.shape[:2]
+        luma_size = height * width
+        chroma_size = luma_size // 4
+        flat = yuv.ravel()
+        y = flat[:luma_size].reshape(height, width)
+        u = flat[luma_size : luma_size + chroma_size].reshape(height // 2, width // 2)
+        v = flat[luma_size + chroma_size :].reshape(height // 2, width // 2)
+        return y, u, v
+
 
 class JPEG_Writer(AV_Writer):
     """AV_Writer with MJPEG encoding."""
@@ -299,11 +554,18 @@ class JPEG_Writer(AV_Writer):
     def on_first_frame(self, input_frame) -> None:
         self.video_stream.pix_fmt = "yuvj422p"
 
-    def encode_frame(self, input_frame, pts: int) -> T.Iterator[Packet]:
+    def get_frame_data(self, input_frame):
+        return input_frame.jpeg_buffer
+
+    def encode_frame(self, frame_data, pts: int) -> T.Iterator[Packet]:
         # for JPEG we only get a single packet per frame
-        packet = Packet()
+        # create the packet from the buffer directly, instead of allocating an empty
+        # packet and replacing its payload afterwards
+        packet = Packet(frame_data)
         packet.stream = self.video_stream
-        packet.payload = input_frame.jpeg_buffer
+        # NOTE: The time base needs to be set on every packet. It is not inherited
+        # from the codec context. Packets without time base are assumed to be in
+        # the stream time base when muxing, which ffmpeg might choose differently.
         packet.time_base = self.time_base
         packet.pts = pts
         # TODO: check if we still need dts here, as they were removed from MPEG_Writer
@@ -337,22 +599,37 @@ class MPEG_Audio_Writer(MPEG_Writer):
 
         # setup stateful packet iterator
         self.audio_packet_iterator = self.iterate_audio_packets()
+        # integer factors to compare audio and video pts, set after header is written
+        self._audio_pts_factor = None
+        self._video_pts_factor = None
 
-    def encode_frame(self, input_frame, pts: int) -> T.Iterator[Packet]:
+    def encode_frame(self, frame_data, pts: int) -> T.Iterator[Packet]:
         # encode video packets from AV_Writer base first
-        yield from super().encode_frame(input_frame, pts)
+        yield from super().encode_frame(frame_data, pts)
 
         if self.audio_parts is None:
             return
 
+        if self._audio_pts_factor is None:
+            # a_pts * a_num / a_den > v_pts * v_num / v_den
+            # <=> a_pts * (a_num * v_den) > v_pts * (v_num * a_den)
+            audio_time_base = self.audio_export_stream.time_base
+            self._audio_pts_factor = (
+                audio_time_base.numerator * self.time_base.denominator
+            )
+            self._video_pts_factor = (
+                self.time_base.numerator * audio_time_base.denominator
+            )
+
         # encode all audio packets up to current frame timestamp
-        frame_ts = self.frame.pts * self.time_base
+        audio_pts_factor = self._audio_pts_factor
+        frame_pts_scaled = self.frame.pts * self._video_pts_factor
         for audio_packet in self.audio_packet_iterator:
-            audio_ts = audio_packet.pts * self.audio_export_stream.time_base
+            audio_pts_scaled = audio_packet.pts * audio_pts_factor
 
             yield audio_packet
 
-            if audio_ts > frame_ts:
+            if audio_pts_scaled > frame_pts_scaled:
                 # done for this frame, pause iteration
                 return
 
@@ -375,7 +652,14 @@ class _AudioPacketIterator:
 
     def iterate_audio_packets(self):
 
+        start_time = self.start_time
+        audio_export_stream = self.audio_export_stream
+        encode = audio_export_stream.encode
+
         last_audio_pts = float("-inf")
+        # NOTE: This generator is only started after the container header has been
+        # written, i.e. the stream time base is valid here.
+        audio_pts_scale = float(1 / audio_export_stream.time_base)
 
         if self.fill_gaps:
             audio_frames_iterator = self._iterate_audio_frames_filling_gaps()
@@ -385,12 +669,12 @@ class _AudioPacketIterator:
         for audio_frame in audio_frames_iterator:
             frame, raw_ts = audio_frame.raw_frame, audio_frame.start_time
 
-            for packet in self.audio_export_stream.encode(frame):
+            for packet in encode(frame):
                 if not packet:
                     continue
 
-                audio_ts = raw_ts - self.start_time
-                audio_pts = int(audio_ts / self.audio_export_stream.time_base)
+                audio_ts = raw_ts - start_time
+                audio_pts = int(audio_ts * audio_pts_scale)
 
                 # ensure strong monotonic pts
                 audio_pts = max(audio_pts, last_audio_pts + 1)
@@ -398,10 +682,10 @@ class _AudioPacketIterator:
 
                 packet.pts = audio_pts
                 packet.dts = audio_pts
-                packet.stream = self.audio_export_stream
+                packet.stream = audio_export_stream
 
                 if audio_ts < 0:
-                    logger.debug(f"Seeking audio: {audio_ts} -> {self.start_time}")
+                    logger.debug(f"Seeking audio: {audio_ts} -> {start_time}")
                     # discard all packets before start time
                     return None
 
@@ -495,30 +779,32 @@ class _AudioPacketIterator:
         if audio_parts is None:
             return
 
-        last_part_idx = 0
-        last_part_last_frame = None
+        AudioFrame = _AudioPacketIterator._AudioFrame
+        AudioGap = _AudioPacketIterator._AudioGap
+
+        last_audio_frame = None
 
-        for part_idx, audio_part in enumerate(audio_parts):
+        for audio_part in audio_parts:
+            # a gap is yielded before the first frame of every but the first part
+            part_started = False
 
             frames = audio_part.container.decode(audio=0)
             for frame, timestamp in zip(frames, audio_part.timestamps):
                 frame.pts = None
 
-                audio_frame = _AudioPacketIterator._AudioFrame(
-                    raw_frame=frame, start_time=timestamp
-                )
+                audio_frame = AudioFrame(raw_frame=frame, start_time=timestamp)
 
-                if part_idx != last_part_idx:
-                    audio_gap = _AudioPacketIterator._AudioGap(
-                        start_time=last_part_last_frame.end_time,
-                        end_time=audio_frame.start_time,
-                    )
-                    yield audio_gap
+                if not part_started:
+                    part_started = True
+                    if last_audio_frame is not None:
+                        yield AudioGap(
+                            start_time=last_audio_frame.end_time,
+                            end_time=audio_frame.start_time,
+                        )
 
                 yield audio_frame
 
-                last_part_idx = part_idx
-                last_part_last_frame = audio_frame
+                last_audio_frame = audio_frame
 
     @staticmethod
     def _generate_silence_audio_frames(stream, start_ts, max_duration: float = None):
@@ -579,35 +865,46 @@ class _AudioPacketIterator:
     @staticmethod
     def _create_audio_raw_frame_factory(stream):
         sample_rate = stream.codec_context.sample_rate
+        frame_size = stream.codec_context.frame_size
         av_format = stream.codec_context.format.name
         av_layout = stream.codec_context.layout.name
-        dtype = np.dtype(_AudioPacketIterator._format_dtypes[av_format])
 
         def f(frame_sample_size):
-            frame = av.AudioFrame(
-                samples=frame_sample_size, format=av_format, layout=av_layout
+            if frame_sample_size == frame_size:
+                # full-sized silence frames are never modified, reuse a single one
+                frame = _AudioPacketIterator._cached_silent_raw_frame(
+                    av_format, av_layout, sample_rate, frame_sample_size
+                )
+                frame.pts = None
+                return frame
+
+            return _AudioPacketIterator._create_silent_raw_frame(
+                av_format, av_layout, sample_rate, frame_sample_size
             )
-            frame.pts = None
-            frame.sample_rate = sample_rate
 
-            for plane in frame.planes:
-                buffer = np.frombuffer(plane, dtype=dtype)
-                buffer[:] = 0
+        return f
+
+    @staticmethod
+    def _create_silent_raw_frame(av_format, av_layout, sample_rate, samples):
+        frame = av.AudioFrame(samples=samples, format=av_format, layout=av_layout)
+        frame.pts = None
+        frame.sample_rate = sample_rate
+
+        zero_bytes = _AudioPacketIterator._zero_bytes
+        for plane in frame.planes:
+            if plane.buffer_size <= len(zero_bytes):
+                plane.update(zero_bytes[: plane.buffer_size])
+            else:
+                plane.update(bytes(plane.buffer_size))
 
-            return frame
+        return frame
 
-        return f
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _cached_silent_raw_frame(av_format, av_layout, sample_rate, samples):
+        return _AudioPacketIterator._create_silent_raw_frame(
+            av_format, av_layout, sample_rate, samples
+        )
 
-    # https://github.com/mikeboers/PyAV/blob/develop/av/audio/frame.pyx
-    _format_dtypes = {
-        "dbl": "<f8",
-        "dblp": "<f8",
-        "flt": "<f4",
-        "fltp": "<f4",
-        "s16": "<i2",
-        "s16p": "<i2",
-        "s32": "<i4",
-        "s32p": "<i4",
-        "u8": "u1",
-        "u8p": "u1",
-    }
+    # shared zero-filled buffer for silencing audio planes
+    _zero_bytes = memoryview(bytes(1 << 20))
@@ -449,6 +449,8 @@ class Recorder(System_Plugin_Base):
             if "frame" in events:
                 frame = events["frame"]
                 try:
+                    # NOTE: The frame's image data is encoded asynchronously and must
+                    # not be modified after writing.
                     self.writer.write_video_frame(frame)
                     self.frame_count += 1
                 except NonMonotonicTimestampError as e:
@@ -469,6 +471,7 @@ class Recorder(System_Plugin_Base):
         duration_s = self.g_pool.get_timestamp() - self.meta_info.start_time_synced_s
 
         # explicit release of VideoWriter
+        timestamp_save_future = None
         try:
             self.writer.release()
         except RuntimeError:
@@ -476,6 +479,8 @@ class Recorder(System_Plugin_Base):
         else:
             logger.debug("Closed media container")
             self.g_pool.capture.intrinsics.save(self.rec_path, custom_name="world")
+            # world timestamps are saved in the background, see AV_Writer.close()
+            timestamp_save_future = getattr(self.writer, "timestamp_save_future", None)
         finally:
             self.writer = None
 
@@ -498,6 +503,13 @@ class Recorder(System_Plugin_Base):
                 "No surface_definitions data found. You may want this if you do marker tracking."
             )
 
+        if timestamp_save_future is not None:
+            # recording files must be complete before announcing recording.stopped
+            try:
+                timestamp_save_future.result()
+            except Exception:
+                logger.exception("Saving world timestamps failed!")
+
         self.meta_info.duration_s = duration_s
         self.meta_info.save_file()
 
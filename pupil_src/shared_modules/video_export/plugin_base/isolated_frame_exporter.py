@@ -115,6 +115,7 @@ def _convert_video_file(
         output_img = process_frame(input_source, input_frame)
         output_frame = input_frame
         output_frame._img = output_img  # it's ._img because .img has no setter
+        # NOTE: output_img is encoded asynchronously and must not be modified
         writer.write_video_frame(output_frame)
 
         if input_source.get_frame_index() >= next_update_idx:
@@ -125,5 +126,7 @@ def _convert_video_file(
             next_update_idx += update_rate
 
     writer.close(timestamp_export_format)
+    if writer.timestamp_save_future is not None:
+        writer.timestamp_save_future.result()
     input_source.cleanup()
     yield "Exporting video completed", 100.0
@@ -270,11 +270,15 @@ def _export_world_video(
             for p in g_pool.plugins:
                 p.recent_events(events)
 
+            # NOTE: The frame's image data is encoded asynchronously and must not
+            # be modified after writing.
             writer.write_video_frame(frame)
             current_frame += 1
             yield "Exporting with pid {}".format(PID), current_frame
 
         writer.close(timestamp_export_format="all")
+        if writer.timestamp_save_future is not None:
+            writer.timestamp_save_future.result()
 
         duration = time() - start_time
         effective_fps = float(current_frame) / duration
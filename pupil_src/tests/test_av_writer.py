@@ -0,0 +1,419 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import threading
+from types import SimpleNamespace
+
+import av
+import numpy as np
+import pytest
+
+from av_writer import (
+    MPEG_Writer,
+    NonMonotonicTimestampError,
+    _AudioPacketIterator,
+    _write_timestamps_csv,
+)
+
+
+def gradient_frame(index, width, height, fps=30.0):
+    y, x = np.mgrid[0:height, 0:width]
+    img = np.stack(
+        (x * 255 // width, y * 255 // height, np.full_like(x, (index * 8) % 256)),
+        axis=-1,
+    ).astype(np.uint8)
+    return SimpleNamespace(
+        index=index,
+        timestamp=index / fps,
+        width=width,
+        height=height,
+        yuv_buffer=None,
+        img=img,
+    )
+
+
+def broken_frame(index, width, height):
+    frame = gradient_frame(index, width, height)
+    frame.img = None
+    return frame
+
+
+class BrokenFrameMPEG_Writer(MPEG_Writer):
+    """MPEG_Writer failing to encode frames without image data."""
+
+    def encode_frame(self, frame_data, pts):
+        if frame_data is None:
+            raise RuntimeError(f"Broken frame with pts {pts}")
+        yield from super().encode_frame(frame_data, pts)
+
+
+class ThreadRecordingFrame:
+    """Frame recording the threads its image data was accessed from."""
+
+    def __init__(self, frame):
+        self._frame = frame
+        self.img_access_threads = []
+
+    def __getattr__(self, name):
+        return getattr(self._frame, name)
+
+    @property
+    def img(self):
+        self.img_access_threads.append(threading.current_thread())
+        return self._frame.img
+
+
+def decode_bgr_frames(video_path):
+    container = av.open(video_path)
+    try:
+        return [frame.to_ndarray(format="bgr24") for frame in container.decode(video=0)]
+    finally:
+        container.close()
+
+
+def demux_video_pts(video_path):
+    container = av.open(video_path)
+    try:
+        return [packet.pts for packet in container.demux(video=0) if packet.size]
+    finally:
+        container.close()
+
+
+def assert_workers_stopped(writer):
+    assert writer.closed
+    assert not writer._encode_thread.is_alive()
+    assert not writer._mux_thread.is_alive()
+
+
+def fake_audio_part(start_ts, frame_count, samples=1024, sample_rate=44100):
+    frames = [
+        SimpleNamespace(pts=index, samples=samples, sample_rate=sample_rate)
+        for index in range(frame_count)
+    ]
+    timestamps = [
+        start_ts + index * samples / sample_rate for index in range(frame_count)
+    ]
+    return SimpleNamespace(
+        container=SimpleNamespace(decode=lambda audio: iter(frames)),
+        timestamps=timestamps,
+    )
+
+
+def fake_audio_stream(sample_rate=44100, frame_size=1024):
+    return SimpleNamespace(
+        codec_context=SimpleNamespace(
+            sample_rate=sample_rate,
+            frame_size=frame_size,
+            format=SimpleNamespace(name="fltp"),
+            layout=SimpleNamespace(name="stereo"),
+        )
+    )
+
+
+def iterate_audio_frames_and_audio_gaps(audio_parts):
+    items = list(_AudioPacketIterator._iterate_audio_frames_and_audio_gaps(audio_parts))
+    frames = [
+        item for item in items if isinstance(item, _AudioPacketIterator._AudioFrame)
+    ]
+    gaps = [item for item in items if isinstance(item, _AudioPacketIterator._AudioGap)]
+    return items, frames, gaps
+
+
+@pytest.mark.parametrize("count", [0, 1, 10, 1000])
+def test_write_timestamps_csv_matches_savetxt(tmpdir, count):
+    timestamps = np.cumsum(np.random.uniform(0.001, 0.1, count)) + 1e4
+    pts = np.arange(count) * 2184
+
+    expected_file = str(tmpdir.join("expected.csv"))
+    np.savetxt(
+        expected_file,
+        np.vstack((timestamps, pts)).T,
+        fmt=["%f", "%i"],
+        delimiter=",",
+        header="timestamps [seconds],pts",
+    )
+    result_file = str(tmpdir.join("result.csv"))
+    _write_timestamps_csv(result_file, timestamps, pts, chunk_size=64)
+
+    with open(expected_file, "rb") as expected, open(result_file, "rb") as result:
+        assert expected.read() == result.read()
+
+
+@pytest.mark.parametrize("width, height", [(640, 480), (640, 482), (641, 481)])
+def test_mpeg_writer_round_trip(tmpdir, width, height):
+    video_path = str(tmpdir.join("world.mp4"))
+    frames = [gradient_frame(index, width, height) for index in range(20)]
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    for frame in frames:
+        writer.write_video_frame(frame)
+    writer.close(timestamp_export_format="npy")
+    writer.timestamp_save_future.result()
+
+    decoded = decode_bgr_frames(video_path)
+    assert len(decoded) == len(frames)
+    for frame, decoded_img in zip(frames, decoded):
+        assert decoded_img.shape == frame.img.shape
+        error = np.abs(decoded_img.astype(int) - frame.img.astype(int)).mean()
+        assert error < 5
+
+    timestamps = np.load(str(tmpdir.join("world_timestamps.npy")))
+    assert np.array_equal(timestamps, [frame.timestamp for frame in frames])
+
+
+def test_mpeg_writer_flushes_all_frames_on_close(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+    # more frames than fit into the worker queues
+    frame_count = 100
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    for index in range(frame_count):
+        writer.write_video_frame(gradient_frame(index, 64, 48))
+    writer.close(timestamp_export_format=None)
+
+    assert_workers_stopped(writer)
+    assert len(writer.timestamps) == frame_count
+    assert len(decode_bgr_frames(video_path)) == frame_count
+
+
+def test_mpeg_writer_timestamps_match_muxed_pts(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+    frame_count = 50
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    for index in range(frame_count):
+        writer.write_video_frame(gradient_frame(index, 64, 48))
+    writer.close(timestamp_export_format="all")
+    writer.timestamp_save_future.result()
+
+    pts = demux_video_pts(video_path)
+    timestamps = np.load(str(tmpdir.join("world_timestamps.npy")))
+    csv_rows = np.loadtxt(str(tmpdir.join("world_timestamps.csv")), delimiter=",")
+    assert len(pts) == len(timestamps) == frame_count
+    assert np.array_equal(csv_rows[:, 0].round(6), timestamps.round(6))
+    assert np.array_equal(np.sort(csv_rows[:, 1]), np.sort(pts))
+
+
+def test_mpeg_writer_non_monotonic_timestamp_releases_writer(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+    frame_count = 30
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    for index in range(frame_count):
+        writer.write_video_frame(gradient_frame(index, 64, 48))
+    with pytest.raises(NonMonotonicTimestampError):
+        writer.write_video_frame(gradient_frame(frame_count - 10, 64, 48))
+
+    assert_workers_stopped(writer)
+    writer.timestamp_save_future.result()
+    assert len(np.load(str(tmpdir.join("world_timestamps.npy")))) == frame_count
+    assert len(decode_bgr_frames(video_path)) == frame_count
+
+
+def test_mpeg_writer_non_monotonic_timestamp_chains_encoding_error(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+
+    # hold back the encoding error until the non-monotonic frame is being written
+    gate = threading.Event()
+
+    class GatedWriter(BrokenFrameMPEG_Writer):
+        def encode_frame(self, frame_data, pts):
+            if frame_data is None:
+                gate.wait()
+            yield from super().encode_frame(frame_data, pts)
+
+    class GateOpeningFrame:
+        def __init__(self, frame):
+            self._frame = frame
+
+        def __getattr__(self, name):
+            return getattr(self._frame, name)
+
+        @property
+        def timestamp(self):
+            gate.set()
+            return self._frame.timestamp
+
+    writer = GatedWriter(video_path, start_time_synced=0.0)
+    for index in range(10):
+        writer.write_video_frame(gradient_frame(index, 64, 48))
+    writer.write_video_frame(broken_frame(10, 64, 48))
+    with pytest.raises(NonMonotonicTimestampError) as exc_info:
+        writer.write_video_frame(GateOpeningFrame(gradient_frame(5, 64, 48)))
+
+    assert isinstance(exc_info.value.__cause__, RuntimeError)
+    assert "Broken frame" in str(exc_info.value.__cause__)
+    assert_workers_stopped(writer)
+    writer.timestamp_save_future.result()
+    assert len(np.load(str(tmpdir.join("world_timestamps.npy")))) == 10
+
+
+def test_mpeg_writer_raises_encoding_errors(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+
+    writer = BrokenFrameMPEG_Writer(video_path, start_time_synced=0.0)
+    for index in range(10):
+        writer.write_video_frame(gradient_frame(index, 64, 48))
+    writer.write_video_frame(broken_frame(10, 64, 48))
+    with pytest.raises(RuntimeError, match="Broken frame"):
+        writer.close()
+
+    assert_workers_stopped(writer)
+    assert writer.last_video_ts == gradient_frame(9, 64, 48).timestamp
+    assert len(writer.timestamps) == 10
+
+
+def test_mpeg_writer_raises_encoding_errors_on_next_write(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+
+    writer = BrokenFrameMPEG_Writer(video_path, start_time_synced=0.0)
+    writer.write_video_frame(gradient_frame(0, 64, 48))
+    writer.write_video_frame(broken_frame(1, 64, 48))
+    # wait for the broken frame to be processed
+    while writer._worker_error is None:
+        writer._encode_thread.join(timeout=0.01)
+    with pytest.raises(RuntimeError, match="Broken frame"):
+        writer.write_video_frame(gradient_frame(2, 64, 48))
+
+    # error is only raised once
+    writer.write_video_frame(gradient_frame(3, 64, 48))
+    writer.close(timestamp_export_format=None)
+    assert_workers_stopped(writer)
+    assert len(writer.timestamps) == 2
+
+
+def test_mpeg_writer_does_not_block_without_encoding_thread(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    writer.write_video_frame(gradient_frame(0, 64, 48))
+    # stop the encoding thread prematurely
+    writer._encode_queue.put(None)
+    writer._encode_thread.join()
+    with pytest.raises(RuntimeError, match="Encoding thread stopped"):
+        for index in range(1, 100):
+            writer.write_video_frame(gradient_frame(index, 64, 48))
+    writer.close(timestamp_export_format=None)
+    assert_workers_stopped(writer)
+
+
+def test_mpeg_writer_accesses_frame_data_on_caller_thread(tmpdir):
+    video_path = str(tmpdir.join("world.mp4"))
+    frames = [
+        ThreadRecordingFrame(gradient_frame(index, 64, 48)) for index in range(20)
+    ]
+
+    writer = MPEG_Writer(video_path, start_time_synced=0.0)
+    for frame in frames:
+        writer.write_video_frame(frame)
+    writer.close(timestamp_export_format=None)
+
+    caller_thread = threading.current_thread()
+    for frame in frames:
+        assert frame.img_access_threads
+        assert all(thread is caller_thread for thread in frame.img_access_threads)
+    assert len(decode_bgr_frames(video_path)) == len(frames)
+
+
+def test_audio_iteration_yields_gap_between_parts():
+    first_part = fake_audio_part(0.0, 3)
+    second_part = fake_audio_part(1.0, 2)
+
+    items, frames, gaps = iterate_audio_frames_and_audio_gaps([first_part, second_part])
+
+    assert len(frames) == 5
+    assert all(frame.raw_frame.pts is None for frame in frames)
+    assert [frame.start_time for frame in frames] == (
+        first_part.timestamps + second_part.timestamps
+    )
+    assert len(gaps) == 1
+    assert items.index(gaps[0]) == 3
+    assert gaps[0].start_time == pytest.approx(frames[2].end_time)
+    assert gaps[0].end_time == 1.0
+
+
+def test_audio_iteration_skips_empty_first_part():
+    second_part = fake_audio_part(1.0, 2)
+
+    _, frames, gaps = iterate_audio_frames_and_audio_gaps(
+        [fake_audio_part(0.0, 0), second_part]
+    )
+
+    assert not gaps
+    assert [frame.start_time for frame in frames] == second_part.timestamps
+
+
+def test_audio_iteration_bridges_empty_middle_part():
+    first_part = fake_audio_part(0.0, 3)
+    last_part = fake_audio_part(1.0, 2)
+
+    items, frames, gaps = iterate_audio_frames_and_audio_gaps(
+        [first_part, fake_audio_part(0.5, 0), last_part]
+    )
+
+    assert len(frames) == 5
+    assert len(gaps) == 1
+    assert items.index(gaps[0]) == 3
+    assert gaps[0].start_time == pytest.approx(frames[2].end_time)
+    assert gaps[0].end_time == 1.0
+
+
+def test_silence_frames_reuse_full_sized_frame():
+    stream = fake_audio_stream()
+
+    frames = list(
+        _AudioPacketIterator._generate_silence_audio_frames(
+            stream, start_ts=0.0, max_duration=10 * 1024 / 44100
+        )
+    )
+
+    assert len(frames) == 10
+    assert all(frame.raw_frame is frames[0].raw_frame for frame in frames)
+    assert [frame.start_time for frame in frames] == pytest.approx(
+        [index * 1024 / 44100 for index in range(10)]
+    )
+
+    # pts set by the encoder is reset when reusing the frame
+    frames[0].raw_frame.pts = 42
+    raw_frame_factory = _AudioPacketIterator._create_audio_raw_frame_factory(stream)
+    raw_frame = raw_frame_factory(1024)
+    assert raw_frame is frames[0].raw_frame
+    assert raw_frame.pts is None
+    assert raw_frame.sample_rate == 44100
+    assert raw_frame.samples == 1024
+    assert not raw_frame.to_ndarray().any()
+
+
+def test_silence_frames_create_partial_frames():
+    raw_frame_factory = _AudioPacketIterator._create_audio_raw_frame_factory(
+        fake_audio_stream()
+    )
+
+    first_frame = raw_frame_factory(100)
+    second_frame = raw_frame_factory(100)
+
+    assert first_frame is not second_frame
+    assert first_frame.samples == 100
+    assert first_frame is not raw_frame_factory(1024)
+
+
+@pytest.mark.parametrize("samples", [1024, 300000])
+def test_silent_raw_frame_is_zeroed(samples):
+    # the second case has planes larger than the shared zero buffer
+    frame = _AudioPacketIterator._create_silent_raw_frame(
+        "fltp", "stereo", 44100, samples
+    )
+
+    assert frame.pts is None
+    assert frame.sample_rate == 44100
+    assert frame.samples == samples
+    assert len(frame.planes) == 2
+    assert not frame.to_ndarray().any()